@@ -1,9 +1,14 @@
 from __future__ import annotations
 
 import base64
+import logging
+import threading
 from pathlib import Path
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx
+
+from engine_loader import load_engine
 
 
 # ---------------------------------------------------------
@@ -21,8 +26,9 @@ st.set_page_config(
 # ---------------------------------------------------------
 HERE = Path(__file__).resolve().parent
 ASSETS = HERE / "assets"
+STATIC = HERE / "static"  # served by Streamlit at app/static/ (server.enableStaticServing)
 
-HERO_IMG = ASSETS / "vero_banner.png"
+HERO_IMG = STATIC / "vero_banner.png"
 LOGO_IMG = ASSETS / "bioergotech_logo.png"
 
 
@@ -38,22 +44,31 @@ THEME = {
 }
 
 
-def img_to_base64(path: Path) -> str:
-    """Return base64 string for an image path."""
-    return base64.b64encode(path.read_bytes()).decode("utf-8")
+def static_url(path: Path) -> str:
+    """Return the URL Streamlit's static file server exposes for a file in app/static."""
+    return f"app/static/{path.relative_to(STATIC).as_posix()}"
 
 
-def inject_global_css(theme: dict) -> None:
-    """Inject CSS for global layout + sidebar styling + hide Streamlit footer."""
-    st.markdown(
-        f"""
+@st.cache_resource(show_spinner=False)
+def _hero_data_uri(path_str: str, mtime: float) -> str:
+    """
+    Return the full PNG data URI for the hero image.
+    Fallback for when static serving is off (e.g. .streamlit/config.toml not read
+    because the app was started from another cwd). Cached per process.
+    """
+    data = base64.b64encode(Path(path_str).read_bytes()).decode("utf-8")
+    return f"data:image/png;base64,{data}"
+
+
+# Theme tokens are constant, so the stylesheet is formatted once up front.
+_GLOBAL_CSS = """
         <style>
         :root {{
-            --primary: {theme["primary"]};
-            --primary-dark: {theme["primary_dark"]};
-            --text: {theme["text"]};
-            --muted: {theme["muted"]};
-            --border: {theme["border"]};
+            --primary: {primary};
+            --primary-dark: {primary_dark};
+            --text: {text};
+            --muted: {muted};
+            --border: {border};
         }}
 
         /* Base font */
@@ -145,9 +160,32 @@ def inject_global_css(theme: dict) -> None:
         /* Hide Streamlit footer */
         footer {{ visibility: hidden; }}
         </style>
-        """,
-        unsafe_allow_html=True,
-    )
+        """.format(**THEME)
+
+
+def inject_global_css() -> None:
+    """Inject CSS for global layout + sidebar styling + hide Streamlit footer."""
+    st.markdown(_GLOBAL_CSS, unsafe_allow_html=True)
+
+
+def _prewarm_engine() -> None:
+    try:
+        load_engine()
+    except Exception:
+        # not cached on failure: the pages retry and show the error themselves
+        logging.getLogger(__name__).exception("VERO engine prewarm failed")
+
+
+@st.cache_resource(show_spinner=False)
+def start_engine_prewarm() -> threading.Thread:
+    """
+    Fill the shared load_engine() cache in the background (once per process),
+    so the pages find the engine ready instead of unpickling it on first render.
+    """
+    t = threading.Thread(target=_prewarm_engine, name="vero-engine-prewarm", daemon=True)
+    add_script_run_ctx(t)
+    t.start()
+    return t
 
 
 def render_sidebar(logo_path: Path) -> None:
@@ -175,14 +213,17 @@ def render_sidebar(logo_path: Path) -> None:
 def render_home(hero_path: Path) -> None:
     """Home page: hero only."""
     if not hero_path.exists():
-        st.warning("Hero image not found. Place it at app/assets/vero_banner.png")
+        st.warning("Hero image not found. Place it at app/static/vero_banner.png")
         return
 
-    hero_b64 = img_to_base64(hero_path)
+    if st.get_option("server.enableStaticServing"):
+        hero_uri = static_url(hero_path)
+    else:
+        hero_uri = _hero_data_uri(str(hero_path), hero_path.stat().st_mtime)
     st.markdown(
         f"""
         <div class="vero-hero"
-             style="background-image:url('data:image/png;base64,{hero_b64}');">
+             style="background-image:url('{hero_uri}');">
         </div>
         """,
         unsafe_allow_html=True,
@@ -192,6 +233,7 @@ def render_home(hero_path: Path) -> None:
 # ---------------------------------------------------------
 # App entry
 # ---------------------------------------------------------
-inject_global_css(THEME)
+start_engine_prewarm()
+inject_global_css()
 render_sidebar(LOGO_IMG)
 render_home(HERO_IMG)
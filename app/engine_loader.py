@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import streamlit as st
+
+from vero_engine import VEROEngine
+
+
+APP_DIR = Path(__file__).resolve().parent  # app/
+BASE_MODEL = APP_DIR / "vero_base_model_prefit.joblib"
+CALIBRATOR = APP_DIR / "vero_calibrator_prefit.joblib"
+META = APP_DIR / "vero_metadata.json"
+
+
+@st.cache_resource(show_spinner=False)
+def load_engine() -> VEROEngine:
+    """
+    Single process-wide VEROEngine shared by every page (and prewarmed by app.py).
+    Keep this in an imported module: a cached function defined in a page script
+    gets its own cache entry per page.
+    """
+    return VEROEngine(BASE_MODEL, CALIBRATOR, META)
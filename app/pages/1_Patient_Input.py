@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import hashlib
 import sys
 from io import BytesIO
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -16,8 +17,8 @@ APP_DIR = Path(__file__).resolve().parents[1]  # app/
 if str(APP_DIR) not in sys.path:
     sys.path.insert(0, str(APP_DIR))
 
-from vero_engine import VEROEngine  # noqa: E402
-from ui_theme import apply_bioergotech_theme  # noqa: E402
+from engine_loader import load_engine  # noqa: E402
+from ui_theme import apply_bioergotech_theme, pretty_label  # noqa: E402
 
 # ------------------------------------------------------------------------------
 # Streamlit config (ONLY ONCE)
@@ -47,17 +48,6 @@ st.markdown(
         color: rgba(0,0,0,0.75);
         margin-top: 0.6rem;
       }
-      .card {
-        border: 1px solid rgba(0,0,0,0.08);
-        border-radius: 16px;
-        padding: 16px 16px 10px 16px;
-        background: rgba(255,255,255,0.9);
-        margin-bottom: 0.8rem;
-      }
-      .card h3 {
-        margin: 0 0 10px 0;
-        font-size: 1.05rem;
-      }
       .small-note {
         color: rgba(0,0,0,0.62);
         font-size: 0.95rem;
@@ -71,6 +61,7 @@ st.markdown(
 # Constants & helpers
 # ------------------------------------------------------------------------------
 LEAVE_BLANK_LABEL = "(leave blank)"
+PATIENT_ID_LIMIT = 200  # max patient_id options sent to the selectbox
 MISSING_LABELS = {"Not Known / Missing", "Missing / Not Noted"}
 
 # Timeline columns (STRICT, per instruction)
@@ -86,11 +77,16 @@ TIMELINE_COLS = [
 
 
 def _is_missing(v: Any) -> bool:
-    if v is None:
+    if v is None or v is pd.NaT:
         return True
+    if isinstance(v, float):
+        return v != v  # NaN
+    if isinstance(v, (str, int, np.integer)):
+        return False
+    # remaining types only: np.float32/float16 (np.float64 is a float), numpy datetimes, pd.NA, containers
     try:
         return bool(pd.isna(v))
-    except Exception:
+    except (TypeError, ValueError):
         return False
 
 
@@ -106,20 +102,27 @@ def _as_text(v: Any) -> str:
     return str(_clean_scalar(v))
 
 
-def pretty_label(code: str) -> str:
-    return str(code).replace("_", " ").strip().title()
-
-
 def parse_numeric(raw: str) -> Optional[float]:
     raw = raw.strip()
-    if raw == "":
+    if not raw:
+        return None
+    # cheap reject before paying for a ValueError
+    if raw[0] not in "+-0123456789.":
         return None
     try:
         return float(raw) if "." in raw else int(raw)
-    except Exception:
+    except ValueError:
         return None
 
 
+def clean_levels(series: pd.Series) -> List[str]:
+    """Distinct non-null values of a column, as strings."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = pd.Series(series.cat.categories)  # already unique, non-null
+    # not stripped: seed_widgets_from_patient matches on the raw str(v)
+    return series.dropna().astype(str).drop_duplicates().tolist()
+
+
 def derive_age_group(age_value: Any) -> Optional[str]:
     if _is_missing(age_value):
         return None
@@ -134,24 +137,107 @@ def derive_age_group(age_value: Any) -> Optional[str]:
 # Engine & data loading
 # ------------------------------------------------------------------------------
 HERE = Path(__file__).resolve().parents[1]
-BASE_MODEL = HERE / "vero_base_model_prefit.joblib"
-CALIBRATOR = HERE / "vero_calibrator_prefit.joblib"
-META = HERE / "vero_metadata.json"
-DEFAULT_DATA_PATH = HERE / "data" / "codige_master_clean__v2.xlsx"
+DEFAULT_XLSX_PATH = HERE / "data" / "codige_master_clean__v2.xlsx"
+# Optional build artifact: `python scripts/build_master_parquet.py` (from the repo root)
+DEFAULT_PARQUET_PATH = DEFAULT_XLSX_PATH.with_suffix(".parquet")
 
 
-@st.cache_resource
-def load_engine() -> VEROEngine:
-    return VEROEngine(BASE_MODEL, CALIBRATOR, META)
+def _mtime(path: Path) -> Optional[float]:
+    return path.stat().st_mtime if path.exists() else None
 
 
-@st.cache_data
-def load_master_df(path: Path) -> pd.DataFrame:
-    df = pd.read_excel(path)
+@st.cache_resource(show_spinner=False)
+def resolve_default_data_path(xlsx_mtime: Optional[float], parquet_mtime: Optional[float]) -> Path:
+    """
+    Parquet if it was built from the current Excel, else the Excel.
+    Freshness is checked against the source sha256 the build script stores in the
+    parquet metadata (mtimes are meaningless after a git checkout); the mtimes only
+    key the cache so the Excel is not re-hashed on every run.
+    """
+    if parquet_mtime is None:
+        return DEFAULT_XLSX_PATH
+    if xlsx_mtime is None:
+        return DEFAULT_PARQUET_PATH
+
+    import pyarrow.parquet as pq
+
+    meta = pq.read_schema(DEFAULT_PARQUET_PATH).metadata or {}
+    built_from = meta.get(b"source_xlsx_sha256", b"").decode("utf-8")
+    current = hashlib.sha256(DEFAULT_XLSX_PATH.read_bytes()).hexdigest()
+    return DEFAULT_PARQUET_PATH if built_from == current else DEFAULT_XLSX_PATH
+
+
+DEFAULT_DATA_PATH = resolve_default_data_path(_mtime(DEFAULT_XLSX_PATH), _mtime(DEFAULT_PARQUET_PATH))
+
+# Dataset caches are shared by every session in the process: keep them small, and let
+# parsed uploads (patient data) expire instead of living as long as the process.
+MASTER_CACHE_ENTRIES = 4
+UPLOAD_CACHE_TTL = "1h"
+
+
+def _normalize_master_df(df: pd.DataFrame, cat_cols: tuple) -> pd.DataFrame:
     df.columns = [str(c).strip() for c in df.columns]
+    if "patient_id" in df.columns:
+        df["patient_id"] = df["patient_id"].astype(str).str.strip()
+        df.index = pd.Index(df["patient_id"], name="_pid")  # hashed row lookup by id
+    present = [c for c in cat_cols if c in df.columns]
+    if present:
+        df[present] = df[present].astype("category")
     return df
 
 
+@st.cache_data
+def load_master_df_from_path(path: Path, cat_cols: tuple) -> pd.DataFrame:
+    if path.suffix == ".parquet":
+        return _normalize_master_df(pd.read_parquet(path, engine="pyarrow"), cat_cols)
+    return _normalize_master_df(pd.read_excel(path), cat_cols)
+
+
+@st.cache_data(show_spinner=False, max_entries=MASTER_CACHE_ENTRIES, ttl=UPLOAD_CACHE_TTL)
+def load_master_df_from_bytes(raw: bytes, cat_cols: tuple) -> pd.DataFrame:
+    # Uploads are re-sent on every rerun; cache the parse on the file bytes.
+    return _normalize_master_df(pd.read_excel(BytesIO(raw)), cat_cols)
+
+
+@st.cache_data(show_spinner=False, max_entries=MASTER_CACHE_ENTRIES)
+def build_levels_from_df(
+    _df: pd.DataFrame, source_key: str, cat_cols: tuple
+) -> Dict[str, List[str]]:
+    """
+    Dropdown levels per categorical column (every observed value).
+    `_df` is not hashed by Streamlit; `source_key` identifies the loaded dataset.
+    """
+    return {c: sorted(clean_levels(_df[c])) for c in cat_cols if c in _df.columns}
+
+
+@st.cache_data(show_spinner=False, max_entries=MASTER_CACHE_ENTRIES)
+def sorted_patient_ids(_df: pd.DataFrame, source_key: str) -> List[str]:
+    # the _pid index holds the stripped string ids built once by the loaders
+    return sorted(_df.index.unique().tolist())
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def search_patient_ids(
+    _ids: List[str], source_key: str, query: str, limit: int
+) -> Tuple[List[str], int]:
+    """First `limit` ids containing `query` (case-insensitive), plus the total match count."""
+    q = query.strip().lower()
+    hits = [i for i in _ids if q in i.lower()] if q else _ids
+    return hits[:limit], len(hits)
+
+
+def patient_row(df: pd.DataFrame, pid: str) -> pd.Series:
+    hit = df.loc[pid]
+    # duplicated ids come back as a frame; keep the first row as before
+    return hit.iloc[0] if isinstance(hit, pd.DataFrame) else hit
+
+
+def build_patient_record_from_row(row: pd.Series, cols: List[str]) -> Dict[str, Any]:
+    # One Series -> dict conversion; absent or missing values become None.
+    d = row.to_dict()
+    return {c: (None if _is_missing(d.get(c)) else _clean_scalar(d.get(c))) for c in cols}
+
+
 # ------------------------------------------------------------------------------
 # Widget key strategy
 # ------------------------------------------------------------------------------
@@ -163,7 +249,7 @@ def seed_widgets_from_patient(
     base_patient: Dict[str, Any],
     feature_cols: List[str],
     numeric_cols: set,
-    levels: Dict[str, List[str]],
+    level_options: Dict[str, List[str]],
 ) -> None:
     for col in feature_cols:
         if col == "age_group":
@@ -173,17 +259,18 @@ def seed_widgets_from_patient(
 
         if col in numeric_cols:
             st.session_state[wk] = _as_text(base_patient.get(col))
-        elif col in levels and levels[col]:
-            opts = [LEAVE_BLANK_LABEL] + levels[col]
+        elif col in level_options:
             v = base_patient.get(col)
             st.session_state[wk] = (
-                LEAVE_BLANK_LABEL if _is_missing(v) or str(v) not in opts else str(v)
+                LEAVE_BLANK_LABEL
+                if _is_missing(v) or str(v) not in level_options[col]
+                else str(v)
             )
         else:
             st.session_state[wk] = _as_text(base_patient.get(col))
 
 
-def input_widget(col: str, numeric_cols: set, levels: Dict[str, List[str]]) -> Any:
+def input_widget(col: str, numeric_cols: set, level_options: Dict[str, List[str]]) -> Any:
     label = pretty_label(col)
     wk = wkey(col)
 
@@ -194,8 +281,8 @@ def input_widget(col: str, numeric_cols: set, levels: Dict[str, List[str]]) -> A
             st.warning(f"{label} expects a number.")
         return v
 
-    if col in levels and levels[col]:
-        pick = st.selectbox(label, [LEAVE_BLANK_LABEL] + levels[col], key=wk)
+    if col in level_options:
+        pick = st.selectbox(label, level_options[col], key=wk)
         return None if pick == LEAVE_BLANK_LABEL else pick
 
     raw = st.text_input(label, key=wk)
@@ -245,6 +332,13 @@ engine = load_engine()
 FEATURE_COLS = engine.feature_cols
 NUM_COLS = set(engine.meta.get("numeric_cols", []))
 CAT_COLS = list(engine.meta.get("categorical_cols", []))
+FEATURE_SET = set(FEATURE_COLS)
+# (category, columns) pairs for the form, keeping only model features
+RENDER_PLAN = [
+    (cat, [c for c in cols if c in FEATURE_SET and c != "age_group"])
+    for cat, cols in CATEGORIES.items()
+]
+FORM_COLS = [c for _, cols in RENDER_PLAN for c in cols]
 
 st.markdown('<div class="section-title">Data source</div>', unsafe_allow_html=True)
 left, right = st.columns([0.65, 0.35])
@@ -258,42 +352,68 @@ with right:
 
 df_master: Optional[pd.DataFrame] = None
 if upload:
-    df_master = pd.read_excel(BytesIO(upload.getvalue()))
+    raw = upload.getvalue()
+    df_master = load_master_df_from_bytes(raw, tuple(CAT_COLS))
+    data_key = upload.file_id  # unique per upload; avoids hashing the bytes a second time
 else:
-    df_master = load_master_df(DEFAULT_DATA_PATH)
+    df_master = load_master_df_from_path(DEFAULT_DATA_PATH, tuple(CAT_COLS))
+    data_key = f"{DEFAULT_DATA_PATH}:{DEFAULT_DATA_PATH.stat().st_mtime}"
 
 if "patient_id" not in df_master.columns:
     st.error("patient_id column missing in dataset.")
     st.stop()
 
-levels = {
-    c: sorted(df_master[c].dropna().astype(str).unique().tolist())
-    for c in CAT_COLS if c in df_master.columns
-}
+levels = build_levels_from_df(df_master, data_key, tuple(CAT_COLS))
+# Selectbox options per categorical column with levels, built once per run
+level_options = {c: [LEAVE_BLANK_LABEL] + v for c, v in levels.items() if v}
 
 st.divider()
 
 st.markdown('<div class="section-title">Select patient (auto-fill)</div>', unsafe_allow_html=True)
-ids = sorted(df_master["patient_id"].astype(str).unique().tolist())
-sel = st.selectbox("patient_id", ["(none)"] + ids)
+ids = sorted_patient_ids(df_master, data_key)
+query = st.text_input(
+    f"Search patient_id (the list shows at most {PATIENT_ID_LIMIT} IDs)",
+    key="patient_id_query",
+    placeholder="Type part of an ID to find patients not listed",
+)
+shown, n_hits = search_patient_ids(ids, data_key, query, PATIENT_ID_LIMIT)
+
+id_options = ["(none)"] + shown
+current = st.session_state.get("patient_id_select")
+if current and current not in id_options:
+    if current in df_master.index:
+        id_options.insert(1, current)  # keep the active selection valid while filtering
+    else:
+        st.session_state["patient_id_select"] = "(none)"  # id absent from this dataset
+sel = st.selectbox("patient_id", id_options, key="patient_id_select")
+if n_hits > len(shown):
+    st.caption(f"Showing {len(shown)} of {n_hits} matching IDs. Type to narrow the list.")
 
 base_patient = {c: None for c in FEATURE_COLS}
 timeline_record: Dict[str, Any] = {}
+# A new upload with the same patient_id must also rebuild records and re-seed widgets
+patient_changed = (
+    st.session_state.get("_active_source_key") != data_key
+    or st.session_state.get("_active_patient_id") != sel
+)
 
 if sel != "(none)":
-    row = df_master.loc[df_master["patient_id"].astype(str) == sel].iloc[0]
-    base_patient = {c: row.get(c, None) for c in FEATURE_COLS}
-    timeline_record = {c: row.get(c, None) for c in TIMELINE_COLS}
+    row = patient_row(df_master, sel)
+    base_patient = build_patient_record_from_row(row, FEATURE_COLS)
+    timeline_record = build_patient_record_from_row(row, TIMELINE_COLS)
 
-    if st.session_state.get("_active_patient_id") != sel:
-        st.session_state["_active_patient_id"] = sel
-        seed_widgets_from_patient(base_patient, FEATURE_COLS, NUM_COLS, levels)
+    if patient_changed:
+        seed_widgets_from_patient(base_patient, FORM_COLS, NUM_COLS, level_options)
 
     st.success(f"Loaded patient {sel}")
 
-st.session_state["patient_record"] = dict(base_patient)
-st.session_state["timeline_record"] = dict(timeline_record)
-st.session_state["selected_patient_id"] = None if sel == "(none)" else sel
+# Records are fresh dicts built above; only publish them when the selection changes
+if patient_changed:
+    st.session_state["_active_source_key"] = data_key
+    st.session_state["_active_patient_id"] = sel
+    st.session_state["patient_record"] = base_patient
+    st.session_state["timeline_record"] = timeline_record
+    st.session_state["selected_patient_id"] = None if sel == "(none)" else sel
 
 st.divider()
 
@@ -303,20 +423,18 @@ st.caption("Leave any field blank if unknown.")
 with st.form("patient_form"):
     updated: Dict[str, Any] = {}
 
-    for cat, cols in CATEGORIES.items():
-        st.markdown(f'<div class="card"><h3>{cat}</h3>', unsafe_allow_html=True)
-        cols_ui = st.columns(3)
-        for i, col in enumerate(cols):
-            if col in FEATURE_COLS:
+    for cat, cols in RENDER_PLAN:
+        with st.container(border=True):
+            st.subheader(cat)
+            cols_ui = st.columns(3)
+            for i, col in enumerate(cols):
                 with cols_ui[i % 3]:
-                    updated[col] = input_widget(col, NUM_COLS, levels)
-        st.markdown("</div>", unsafe_allow_html=True)
+                    updated[col] = input_widget(col, NUM_COLS, level_options)
 
     submitted = st.form_submit_button("Save inputs for scoring", use_container_width=True)
 
 if submitted:
-    merged = dict(base_patient)
-    merged.update(updated)
+    merged = {**base_patient, **updated}
     merged["age_group"] = derive_age_group(merged.get("age"))
 
     st.session_state["patient_record"] = merged
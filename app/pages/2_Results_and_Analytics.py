@@ -19,9 +19,9 @@ APP_DIR = Path(__file__).resolve().parents[1]  # app/
 if str(APP_DIR) not in sys.path:
     sys.path.insert(0, str(APP_DIR))
 
-from vero_engine import VEROEngine  # noqa: E402
+from engine_loader import load_engine  # noqa: E402
 from pdf_report import PDFInputs, build_vero_pdf  # noqa: E402
-from ui_theme import apply_bioergotech_theme  # noqa: E402
+from ui_theme import apply_bioergotech_theme, pretty_label  # noqa: E402
 
 # ------------------------------------------------------------------------------
 # Streamlit config (ONLY ONCE)
@@ -61,14 +61,6 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# ------------------------------------------------------------------------------
-# Paths to artifacts
-# ------------------------------------------------------------------------------
-HERE = Path(__file__).resolve().parents[1]
-BASE_MODEL = HERE / "vero_base_model_prefit.joblib"
-CALIBRATOR = HERE / "vero_calibrator_prefit.joblib"
-META = HERE / "vero_metadata.json"
-
 # ------------------------------------------------------------------------------
 # Timeline columns (STRICT, per your instruction)
 # ------------------------------------------------------------------------------
@@ -92,19 +84,9 @@ TIMELINE_LABELS = {
     "radiotherapy_end_date": "Radiotherapy end",
 }
 
-# ------------------------------------------------------------------------------
-# Engine loader
-# ------------------------------------------------------------------------------
-@st.cache_resource
-def load_engine() -> VEROEngine:
-    return VEROEngine(BASE_MODEL, CALIBRATOR, META)
-
 # ------------------------------------------------------------------------------
 # Helpers
 # ------------------------------------------------------------------------------
-def pretty_label(code: str) -> str:
-    return str(code).replace("_", " ").strip().title()
-
 def derive_age_group(age_value: Any) -> Optional[str]:
     if age_value is None or age_value == "":
         return None
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
 import base64
 import streamlit as st
@@ -16,6 +17,12 @@ def _img_to_base64(path: Path) -> str:
     return base64.b64encode(path.read_bytes()).decode("utf-8")
 
 
+@lru_cache(maxsize=256)
+def pretty_label(code: str) -> str:
+    """Human-readable label for a column code (memoized: page scripts re-run on every interaction)."""
+    return str(code).replace("_", " ").strip().title()
+
+
 def apply_bioergotech_theme(
     *,
     page_title: str = "VERO Risk Calculator",
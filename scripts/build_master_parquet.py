@@ -0,0 +1,35 @@
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+ROOT = Path(__file__).resolve().parents[1]  # project root
+IN_XLSX_PATH = ROOT / "app" / "data" / "codige_master_clean__v2.xlsx"
+OUT_PARQUET_PATH = IN_XLSX_PATH.with_suffix(".parquet")
+
+def main():
+    """
+    Pre-convert the default master Excel to Parquet so the app skips
+    openpyxl parsing on cold start.
+
+    Run from the repo root (needs pandas, openpyxl, pyarrow):
+        python scripts/build_master_parquet.py
+    then commit/ship app/data/codige_master_clean__v2.parquet next to the Excel.
+
+    The Excel's sha256 is stored in the parquet metadata; the app only uses the
+    parquet while it matches the current Excel, so re-run this after editing it.
+    """
+    raw = IN_XLSX_PATH.read_bytes()
+    df = pd.read_excel(IN_XLSX_PATH)
+    df.columns = [str(c).strip() for c in df.columns]
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})  # keep the pandas dtype metadata
+    metadata[b"source_xlsx_sha256"] = hashlib.sha256(raw).hexdigest().encode("utf-8")
+    pq.write_table(table.replace_schema_metadata(metadata), OUT_PARQUET_PATH)
+    print(f"Saved master parquet -> {OUT_PARQUET_PATH}")
+
+if __name__ == "__main__":
+    main()